@@ -1,12 +1,21 @@
 # app.py - Haupt-Flask-Anwendung mit allen API-Routes
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, g, request, jsonify, make_response, send_from_directory, stream_with_context
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-from datetime import datetime, timedelta, date
-from sqlalchemy import func
+from datetime import timedelta, date
+from sqlalchemy import event, func, case, select
+from sqlalchemy.engine import Engine
 from dotenv import load_dotenv
+from cachetools import TTLCache
+from functools import wraps
+import hashlib
 import logging
+import orjson
 import os
+import sqlite3
+import textwrap
+import threading
 import google.generativeai as genai
 
 from models import db, Module, LearningSession, AIRecommendation
@@ -21,6 +30,72 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Unter gevent (gunicorn -k gevent) auch gRPC-Aufrufe der Gemini API kooperativ ausführen
+try:
+    from gevent import monkey
+    if monkey.is_module_patched('socket'):
+        import grpc.experimental.gevent
+        grpc.experimental.gevent.init_gevent()
+except ImportError:
+    pass
+
+# Feste Teile des Gemini-Prompts (vor und nach der Modulliste)
+_PROMPT_HEADER = "Ich lerne für folgende Module:\n\n"
+
+_PROMPT_TAIL = textwrap.dedent("""
+        Du bist ein intelligenter Lernplan-Generator.
+        Erstelle auf Basis der folgenden Eingaben einen detaillierten, realistischen Lernplan für die nächsten 2 Wochen.
+
+        **Ziel:**
+        Erstelle einen Lernplan, der die Vorbereitung optimal auf die kommenden Prüfungen verteilt.
+        Gib für jeden Tag folgendes an:
+        - Datum
+        - zu lernende Module
+        - empfohlene Lernzeit in Stunden pro Modul
+        - ggf. kurze Lernziele oder Schwerpunkt-Themen
+
+        **Anforderungen an die Ausgabe:**
+        - Zeitraum: die nächsten 14 Tage (beginnend ab heute oder ab angegebenem Startdatum)
+        - Ausgabe im klaren, tabellarischen oder Listenformat
+        - Achte auf eine realistische Verteilung der Lernzeit (keine 10 Stunden am Stück)
+        - Berücksichtige Ruhetage oder kürzere Lerneinheiten an Wochenenden
+
+        **Format der Antwort:**
+        Tag (Datum):
+        - Modul: X Stunden – Thema/Fokus: ...
+        """)
+
+
+# SQLite-Einstellungen für parallele Zugriffe (WAL: Lesen während Schreibvorgängen)
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-64000',
+)
+
+
+@event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Setzt SQLite-Pragmas für jede neue Verbindung (andere Datenbanken unverändert)"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class ORJSONProvider(JSONProvider):
+    """JSON-Provider auf Basis von orjson (serialisiert date/datetime nativ)"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 def create_app():
     """Flask-App erstellen und konfigurieren"""
@@ -34,15 +109,23 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///studium_tracking.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Connection-Pool für Server-Datenbanken (z.B. PostgreSQL), SQLite nutzt die Standardwerte
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '20')),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+            'pool_pre_ping': True,
+            'pool_recycle': 1800
+        }
+    
     # Gemini API Konfiguration
     app.config['GEMINI_API_KEY'] = os.getenv('GEMINI_API_KEY', '')
     app.config['GEMINI_MODEL'] = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash-exp')
     app.config['GEMINI_TEMPERATURE'] = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
     app.config['GEMINI_MAX_TOKENS'] = int(os.getenv('GEMINI_MAX_TOKENS', '2048'))
     
-    # JSON Konfiguration
-    app.config['JSON_SORT_KEYS'] = False
-    app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+    # JSON Konfiguration (orjson, kompakt, Schlüssel in Einfügereihenfolge)
+    app.json = ORJSONProvider(app)
     
     # CORS aktivieren
     CORS(app)
@@ -50,12 +133,27 @@ def create_app():
     # Datenbank initialisieren
     db.init_app(app)
     
-    # Gemini API konfigurieren
-    if app.config['GEMINI_API_KEY'] and app.config['GEMINI_API_KEY']:
+    # N+1 Query Erkennung im Debug-Modus (optional)
+    if app.config['DEBUG']:
+        try:
+            from nplusone.ext.flask_sqlalchemy import NPlusOne
+            NPlusOne(app)
+            logger.info("nplusone N+1 Query Erkennung aktiviert")
+        except ImportError:
+            logger.debug("nplusone nicht installiert - N+1 Query Erkennung deaktiviert")
+    
+    # Gemini API konfigurieren (Verfügbarkeit wird einmalig beim Start festgelegt)
+    api_key = app.config['GEMINI_API_KEY']
+    app.config['GEMINI_ENABLED'] = bool(api_key and api_key != 'your-api-key-here')
+    
+    if app.config['GEMINI_ENABLED']:
         try:
             genai.configure(api_key=app.config['GEMINI_API_KEY'])
+            # Modell einmalig anlegen und für alle Anfragen wiederverwenden
+            app.extensions['gemini_model'] = genai.GenerativeModel(app.config['GEMINI_MODEL'])
             logger.info("Gemini API erfolgreich konfiguriert")
         except Exception as e:
+            app.config['GEMINI_ENABLED'] = False
             logger.error(f"Fehler bei Gemini API Konfiguration: {e}")
     else:
         logger.warning("GEMINI_API_KEY nicht gesetzt - KI-Funktionen deaktiviert")
@@ -63,6 +161,9 @@ def create_app():
     # Datenbank-Tabellen erstellen
     with app.app_context():
         db.create_all()
+        # create_all legt Indizes nur für neue Tabellen an - bestehende DBs nachziehen
+        for index in LearningSession.__table__.indexes:
+            index.create(db.engine, checkfirst=True)
         logger.info("Datenbank-Tabellen erstellt/überprüft")
     
     return app
@@ -70,25 +171,150 @@ def create_app():
 
 app = create_app()
 
+def request_today():
+    """Heutiges Datum, einmal pro Request ermittelt (ETag und Dashboard nutzen denselben Tag)"""
+    if 'today' not in g:
+        g.today = date.today()
+    return g.today
+
+
 def validate_date(date_string):
     """Validiert Datumsformat YYYY-MM-DD"""
     try:
-        return datetime.strptime(date_string, '%Y-%m-%d').date()
+        parsed = date.fromisoformat(date_string)
     except (ValueError, TypeError):
         return None
+    # Ab Python 3.11 akzeptiert fromisoformat auch '20240101' oder Wochendaten
+    if parsed.isoformat() != date_string:
+        return None
+    return parsed
 
 
-def get_sessions_by_date_range(start_date, end_date):
-    """Holt alle Sessions innerhalb eines Datumsbereichs"""
-    return LearningSession.query.filter(
-        LearningSession.date >= start_date,
-        LearningSession.date <= end_date
-    ).all()
+# Datenversion: wird bei jeder Änderung erhöht und macht gecachte Antworten ungültig
+_data_version = 0
+_cache_lock = threading.Lock()
+# Pro Prozess zufällig, damit sich ETags verschiedener Worker nie gleichen
+_etag_salt = os.urandom(8).hex()
 
 
-def calculate_total_hours(sessions):
-    """Berechnet Gesamtstunden aus Sessions"""
-    return round(sum(session.duration for session in sessions), 2)
+def bump_data_version():
+    """Markiert alle gecachten GET-Antworten als veraltet"""
+    global _data_version
+    with _cache_lock:
+        _data_version += 1
+
+
+def cached(ttl):
+    """
+    Cacht erfolgreiche JSON-Antworten eines GET-Handlers für ttl Sekunden.
+    Schlägt der Handler fehl (5xx), wird die letzte erfolgreiche Antwort ausgeliefert.
+    """
+    def decorator(view):
+        cache = TTLCache(maxsize=16, ttl=ttl)
+        stale = {}
+        
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # Tag gehört zum Schlüssel: hours_today & Co. ändern sich um Mitternacht
+            key = (request.path, _data_version, request_today())
+            with _cache_lock:
+                hit = cache.get(key)
+            if hit is not None:
+                return app.response_class(hit[0], status=hit[1], mimetype='application/json')
+            
+            response, status = view(*args, **kwargs)
+            
+            if status == 200:
+                entry = (response.get_data(), status)
+                with _cache_lock:
+                    cache[key] = entry
+                    stale[request.path] = entry
+            elif status >= 500 and request.path in stale:
+                logger.warning(f"Liefere veraltete Cache-Antwort für {request.path}")
+                body, status = stale[request.path]
+                response = app.response_class(body, status=status, mimetype='application/json')
+                response.cache_control.no_store = True
+                return response
+            
+            return response, status
+        
+        return wrapper
+    return decorator
+
+
+def conditional(view):
+    """
+    ETag für GET-Handler aus Datenversion und URL. Kennt der Client die aktuelle
+    Version (If-None-Match), wird 304 ohne Body gesendet.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = hashlib.md5(
+            f"{_etag_salt}:{_data_version}:{request_today()}:{request.full_path}".encode()
+        ).hexdigest()
+        
+        if etag in request.if_none_match:
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            # Fehler und veraltete Fallback-Antworten bekommen kein ETag
+            if response.status_code != 200 or response.cache_control.no_store:
+                return response
+        
+        response.set_etag(etag)
+        # Browser muss immer nachfragen (sonst zeigt er nach Änderungen die alte Liste)
+        response.cache_control.no_cache = True
+        return response
+    
+    return wrapper
+
+
+def parse_session_data(data):
+    """
+    Validiert die Daten einer Lern-Session
+    Returns: (Spalten-Dictionary, None) oder (None, Fehlermeldung)
+    """
+    if not isinstance(data, dict):
+        return None, 'Ungültige Session-Daten'
+    
+    for field in ('module_id', 'duration', 'date'):
+        if field not in data:
+            return None, f'{field} ist erforderlich'
+    
+    # Nur ganze Zahlen oder Ziffern-Strings (int() würde 2.9 still zu 2 abschneiden)
+    module_id = data['module_id']
+    if isinstance(module_id, str) and module_id.isascii() and module_id.isdigit():
+        module_id = int(module_id)
+    elif not isinstance(module_id, int) or isinstance(module_id, bool):
+        return None, 'module_id muss eine Zahl sein'
+    
+    try:
+        duration = float(data['duration'])
+    except (TypeError, ValueError):
+        return None, 'duration muss eine Zahl sein'
+    
+    if duration <= 0:
+        return None, 'duration muss größer als 0 sein'
+    
+    session_date = validate_date(data['date'])
+    if session_date is None:
+        return None, 'Ungültiges Datumsformat. Nutze YYYY-MM-DD'
+    
+    return {
+        'module_id': module_id,
+        'duration': duration,
+        'date': session_date,
+        'notes': data.get('notes', '')
+    }, None
+
+
+def _actual_hours_map():
+    """Gelernte Stunden aller Module in einer GROUP BY Abfrage: {module_id: Stunden}"""
+    rows = db.session.query(
+        LearningSession.module_id,
+        func.sum(LearningSession.duration)
+    ).group_by(LearningSession.module_id).all()
+    return {module_id: round(total, 2) for module_id, total in rows}
 
 @app.route('/api/modules', methods=['POST'])
 def create_module():
@@ -123,8 +349,10 @@ def create_module():
         db.session.add(module)
         db.session.commit()
         
+        bump_data_version()
         logger.info(f"Neues Modul erstellt: {module.name} (ID: {module.id})")
-        return jsonify(module.to_dict()), 201
+        # Neues Modul hat noch keine Sessions - kein Nachladen für actual_hours nötig
+        return jsonify(module.to_dict(actual_hours=0)), 201
         
     except Exception as e:
         logger.error(f"Fehler beim Erstellen des Moduls: {e}")
@@ -133,25 +361,33 @@ def create_module():
 
 
 @app.route('/api/modules', methods=['GET'])
+@conditional
 def get_modules():
     """
     GET /api/modules - Gibt alle Module mit Fortschrittsberechnung zurück
     """
     try:
         modules = Module.query.all()
-        return jsonify([module.to_dict() for module in modules]), 200
+        actual_hours = _actual_hours_map()
+        return jsonify([
+            module.to_dict(actual_hours=actual_hours.get(module.id, 0))
+            for module in modules
+        ]), 200
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Module: {e}")
         return jsonify({'error': str(e)}), 500
 
 
 @app.route('/api/modules/<int:module_id>', methods=['GET'])
+@conditional
 def get_module(module_id):
     """
     GET /api/modules/<id> - Gibt Modul-Details inkl. aller Sessions zurück
     """
     try:
-        module = Module.query.get_or_404(module_id)
+        module = Module.query.options(
+            db.joinedload(Module.sessions)
+        ).get_or_404(module_id)
         return jsonify(module.to_dict(include_sessions=True)), 200
     except Exception as e:
         logger.error(f"Fehler beim Abrufen des Moduls {module_id}: {e}")
@@ -170,6 +406,7 @@ def delete_module(module_id):
         db.session.delete(module)
         db.session.commit()
         
+        bump_data_version()
         logger.info(f"Modul gelöscht: {module_name} (ID: {module_id})")
         return jsonify({'message': f'Modul "{module_name}" erfolgreich gelöscht'}), 200
         
@@ -188,37 +425,24 @@ def create_session():
         data = request.get_json()
         
         # Validierung
-        required_fields = ['module_id', 'duration', 'date']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'{field} ist erforderlich'}), 400
-        
-        if data['duration'] <= 0:
-            return jsonify({'error': 'duration muss größer als 0 sein'}), 400
+        record, error = parse_session_data(data)
+        if error:
+            return jsonify({'error': error}), 400
         
         # Modul existiert?
-        module = Module.query.get(data['module_id'])
+        module = Module.query.get(record['module_id'])
         if not module:
             return jsonify({'error': 'Modul nicht gefunden'}), 404
         
-        # Datum validieren
-        session_date = validate_date(data['date'])
-        if session_date is None:
-            return jsonify({'error': 'Ungültiges Datumsformat. Nutze YYYY-MM-DD'}), 400
-        
         # Session erstellen
-        session = LearningSession(
-            module_id=data['module_id'],
-            duration=float(data['duration']),
-            date=session_date,
-            notes=data.get('notes', '')
-        )
+        session = LearningSession(**record)
         
         db.session.add(session)
         db.session.commit()
         
+        bump_data_version()
         logger.info(f"Neue Session erstellt: {session.duration}h für Modul {module.name}")
-        return jsonify(session.to_dict()), 201
+        return jsonify(session.to_dict(module_name=module.name)), 201
         
     except Exception as e:
         logger.error(f"Fehler beim Erstellen der Session: {e}")
@@ -226,7 +450,50 @@ def create_session():
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/sessions/bulk', methods=['POST'])
+def create_sessions_bulk():
+    """
+    POST /api/sessions/bulk - Erstellt mehrere Lern-Sessions auf einmal (z.B. Import)
+    Body: [ { "module_id": int, "duration": float, "date": str (YYYY-MM-DD), "notes": str }, ... ]
+    """
+    try:
+        data = request.get_json()
+        
+        if not isinstance(data, list) or not data:
+            return jsonify({'error': 'Liste von Sessions erforderlich'}), 400
+        
+        # Validierung aller Einträge vor dem ersten INSERT
+        records = []
+        for index, item in enumerate(data):
+            record, error = parse_session_data(item)
+            if error:
+                return jsonify({'error': f'Session {index}: {error}'}), 400
+            records.append(record)
+        
+        # Module existieren? (eine Abfrage für alle IDs)
+        module_ids = {record['module_id'] for record in records}
+        found_ids = set(db.session.execute(
+            select(Module.id).where(Module.id.in_(module_ids))
+        ).scalars())
+        if module_ids - found_ids:
+            return jsonify({'error': 'Modul nicht gefunden'}), 404
+        
+        # Alle Sessions in einem INSERT mit einem Commit
+        db.session.bulk_insert_mappings(LearningSession, records)
+        db.session.commit()
+        
+        bump_data_version()
+        logger.info(f"{len(records)} Sessions per Bulk-Import erstellt")
+        return jsonify({'created': len(records)}), 201
+        
+    except Exception as e:
+        logger.error(f"Fehler beim Bulk-Import der Sessions: {e}")
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @app.route('/api/sessions', methods=['GET'])
+@conditional
 def get_sessions():
     """
     GET /api/sessions - Gibt alle Sessions chronologisch sortiert zurück
@@ -235,13 +502,30 @@ def get_sessions():
     try:
         limit = request.args.get('limit', type=int)
         
-        query = LearningSession.query.order_by(LearningSession.date.desc())
+        # Spalten direkt abfragen (inkl. Modulname per JOIN) statt ORM-Objekte zu laden
+        query = select(
+            LearningSession.id,
+            LearningSession.module_id,
+            Module.name,
+            LearningSession.duration,
+            LearningSession.date,
+            LearningSession.notes,
+            LearningSession.created_at
+        ).join(Module).order_by(LearningSession.date.desc())
         
         if limit:
             query = query.limit(limit)
         
-        sessions = query.all()
-        return jsonify([session.to_dict() for session in sessions]), 200
+        rows = db.session.execute(query).all()
+        return jsonify([{
+            'id': row.id,
+            'module_id': row.module_id,
+            'module_name': row.name,
+            'duration': row.duration,
+            'date': row.date,
+            'notes': row.notes,
+            'created_at': row.created_at
+        } for row in rows]), 200
         
     except Exception as e:
         logger.error(f"Fehler beim Abrufen der Sessions: {e}")
@@ -259,6 +543,7 @@ def delete_session(session_id):
         db.session.delete(session)
         db.session.commit()
         
+        bump_data_version()
         logger.info(f"Session gelöscht: ID {session_id}")
         return jsonify({'message': 'Session erfolgreich gelöscht'}), 200
         
@@ -267,21 +552,85 @@ def delete_session(session_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def _sse(payload):
+    """Formatiert ein Dictionary als Server-Sent Event"""
+    return f"data: {app.json.dumps(payload)}\n\n"
+
+
+def save_recommendation(text):
+    """Speichert eine fertige KI-Empfehlung"""
+    if not text:
+        raise Exception("Keine Antwort von Gemini API erhalten")
+
+    recommendation = AIRecommendation(recommendation_text=text)
+    db.session.add(recommendation)
+    db.session.commit()
+
+    bump_data_version()
+    logger.info(f"Neue KI-Empfehlung erstellt (ID: {recommendation.id})")
+    return recommendation
+
+
+def stream_recommendation(response):
+    """
+    Reicht die Gemini-Antwort stückweise als SSE weiter und speichert den
+    vollständigen Text. Bricht der Client ab, wird trotzdem zu Ende generiert.
+    """
+    parts = []
+    recommendation = None
+    try:
+        for chunk in response:
+            parts.append(chunk.text)
+            yield _sse({'text': chunk.text})
+        recommendation = save_recommendation(''.join(parts))
+        yield _sse({'recommendation': recommendation.to_dict()})
+    except GeneratorExit:
+        # Client hat die Verbindung getrennt - Rest abholen und trotzdem speichern
+        if recommendation is None:
+            try:
+                for chunk in response:
+                    parts.append(chunk.text)
+                save_recommendation(''.join(parts))
+            except Exception as e:
+                logger.error(f"Fehler beim Speichern der Empfehlung: {e}")
+                db.session.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Fehler beim Erstellen der Empfehlung: {e}")
+        db.session.rollback()
+        yield _sse({'error': 'Fehler bei der KI-Generierung', 'message': str(e)})
+
+
 @app.route('/api/recommend', methods=['POST'])
 def create_recommendation():
     """
     POST /api/recommend - Ruft Gemini API auf und speichert Empfehlung
+    Antwort als Server-Sent Events: { "text": str } je Teilantwort,
+    abschließend { "recommendation": {...} } oder { "error": str, "message": str }
     """
     try:
         # Prüfe ob API konfiguriert ist
-        if not app.config['GEMINI_API_KEY'] or app.config['GEMINI_API_KEY'] == 'your-api-key-here':
+        if not app.config['GEMINI_ENABLED']:
             return jsonify({
                 'error': 'Gemini API nicht konfiguriert',
                 'message': 'Bitte GEMINI_API_KEY Umgebungsvariable setzen'
             }), 503
 
-        # Hole alle Module mit ihren Daten
-        modules = Module.query.all()
+        # Alle Module mit gelernten Stunden in einer Abfrage (ohne ORM-Objekte)
+        hours = select(
+            LearningSession.module_id,
+            func.sum(LearningSession.duration).label('actual_hours')
+        ).group_by(LearningSession.module_id).subquery()
+
+        modules = db.session.execute(
+            select(
+                Module.id,
+                Module.name,
+                Module.target_hours,
+                Module.exam_date,
+                func.coalesce(hours.c.actual_hours, 0).label('actual_hours')
+            ).outerjoin(hours, hours.c.module_id == Module.id).order_by(Module.id)
+        ).all()
 
         if not modules:
             return jsonify({
@@ -290,62 +639,41 @@ def create_recommendation():
             }), 400
 
         # Erstelle Prompt für Gemini
-        prompt = "Ich lerne für folgende Module:\n\n"
+        module_lines = []
 
         for module in modules:
-            actual_hours = module.get_actual_hours()
+            actual_hours = round(module.actual_hours, 2)
             remaining_hours = max(0, module.target_hours - actual_hours)
             exam_info = f" (Prüfung am {module.exam_date.strftime('%d.%m.%Y')})" if module.exam_date else ""
 
-            prompt += f"- {module.name}: Ziel {module.target_hours}h, bereits gelernt {actual_hours}h, "
-            prompt += f"noch {remaining_hours}h offen{exam_info}\n"
+            module_lines.append(
+                f"- {module.name}: Ziel {module.target_hours}h, bereits gelernt {actual_hours}h, "
+                f"noch {remaining_hours}h offen{exam_info}\n"
+            )
 
-        prompt += """
-        Du bist ein intelligenter Lernplan-Generator.
-        Erstelle auf Basis der folgenden Eingaben einen detaillierten, realistischen Lernplan für die nächsten 2 Wochen.
+        prompt = "".join([_PROMPT_HEADER, *module_lines, _PROMPT_TAIL])
 
-        **Ziel:**
-        Erstelle einen Lernplan, der die Vorbereitung optimal auf die kommenden Prüfungen verteilt.
-        Gib für jeden Tag folgendes an:
-        - Datum
-        - zu lernende Module
-        - empfohlene Lernzeit in Stunden pro Modul
-        - ggf. kurze Lernziele oder Schwerpunkt-Themen
-
-        **Anforderungen an die Ausgabe:**
-        - Zeitraum: die nächsten 14 Tage (beginnend ab heute oder ab angegebenem Startdatum)
-        - Ausgabe im klaren, tabellarischen oder Listenformat
-        - Achte auf eine realistische Verteilung der Lernzeit (keine 10 Stunden am Stück)
-        - Berücksichtige Ruhetage oder kürzere Lerneinheiten an Wochenenden
-
-        **Format der Antwort:**
-        Tag (Datum):
-        - Modul: X Stunden – Thema/Fokus: ...
-        """
+        # Verbindung vor dem Gemini-Aufruf zurückgeben, damit sie nicht während des
+        # ganzen Streams belegt bleibt - save_recommendation holt sich eine neue
+        db.session.close()
 
         logger.info(f"Sende Anfrage an Gemini API (Modell: {app.config['GEMINI_MODEL']})...")
         
-        # Gemini API aufrufen mit konfigurierbaren Parametern
-        model = genai.GenerativeModel(app.config['GEMINI_MODEL'])
-        response = model.generate_content(
+        # Gemini API im Streaming-Modus aufrufen, Teilantworten direkt weiterreichen
+        response = app.extensions['gemini_model'].generate_content(
             prompt,
             generation_config={
                 'temperature': app.config['GEMINI_TEMPERATURE'],
                 'max_output_tokens': app.config['GEMINI_MAX_TOKENS']
-            }
-        )
-        
-        if not response or not response.text:
-            raise Exception("Keine Antwort von Gemini API erhalten")        # Empfehlung speichern
-        recommendation = AIRecommendation(
-            recommendation_text=response.text
+            },
+            stream=True
         )
 
-        db.session.add(recommendation)
-        db.session.commit()
-
-        logger.info(f"Neue KI-Empfehlung erstellt (ID: {recommendation.id})")
-        return jsonify(recommendation.to_dict()), 201
+        return Response(
+            stream_with_context(stream_recommendation(response)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
 
     except Exception as e:
         logger.error(f"Fehler beim Erstellen der Empfehlung: {e}")
@@ -357,6 +685,8 @@ def create_recommendation():
 
 
 @app.route('/api/recommend', methods=['GET'])
+@conditional
+@cached(ttl=300)
 def get_recommendation():
     """
     GET /api/recommend - Gibt die letzte Empfehlung zurück
@@ -376,28 +706,37 @@ def get_recommendation():
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/dashboard', methods=['GET'])
+@conditional
+@cached(ttl=15)
 def get_dashboard():
     """
     GET /api/dashboard - Übersicht mit Statistiken
     Returns: Gesamtstunden heute/Woche/Monat, alle Module, letzte Empfehlung
     """
     try:
-        today = date.today()
+        today = request_today()
         week_start = today - timedelta(days=today.weekday())
         month_start = today.replace(day=1)
         
-        # Sessions für verschiedene Zeiträume
-        today_sessions = get_sessions_by_date_range(today, today)
-        week_sessions = get_sessions_by_date_range(week_start, today)
-        month_sessions = get_sessions_by_date_range(month_start, today)
-        
-        # Stunden berechnen
-        hours_today = calculate_total_hours(today_sessions)
-        hours_week = calculate_total_hours(week_sessions)
-        hours_month = calculate_total_hours(month_sessions)
+        # Stunden und Sessions für alle Zeiträume in einer Abfrage
+        is_today = LearningSession.date == today
+        in_week = LearningSession.date >= week_start
+        in_month = LearningSession.date >= month_start
+        
+        stats = db.session.query(
+            func.sum(case((is_today, LearningSession.duration))).label('hours_today'),
+            func.sum(case((in_week, LearningSession.duration))).label('hours_week'),
+            func.sum(case((in_month, LearningSession.duration))).label('hours_month'),
+            func.count(case((is_today, 1))).label('sessions_today'),
+            func.count(case((in_week, 1))).label('sessions_week')
+        ).filter(
+            LearningSession.date >= min(week_start, month_start),
+            LearningSession.date <= today
+        ).one()
         
         # Alle Module mit Fortschritt
         modules = Module.query.all()
+        actual_hours = _actual_hours_map()
         
         # Letzte Empfehlung
         last_recommendation = AIRecommendation.query.order_by(
@@ -406,14 +745,17 @@ def get_dashboard():
         
         dashboard_data = {
             'statistics': {
-                'hours_today': hours_today,
-                'hours_week': hours_week,
-                'hours_month': hours_month,
-                'sessions_today': len(today_sessions),
-                'sessions_week': len(week_sessions),
+                'hours_today': round(stats.hours_today or 0, 2),
+                'hours_week': round(stats.hours_week or 0, 2),
+                'hours_month': round(stats.hours_month or 0, 2),
+                'sessions_today': stats.sessions_today,
+                'sessions_week': stats.sessions_week,
                 'total_modules': len(modules)
             },
-            'modules': [module.to_dict() for module in modules],
+            'modules': [
+                module.to_dict(actual_hours=actual_hours.get(module.id, 0))
+                for module in modules
+            ],
             'last_recommendation': last_recommendation.to_dict() if last_recommendation else None
         }
         
@@ -439,4 +781,5 @@ def internal_error(error):
     return jsonify({'error': 'Interner Serverfehler'}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Nur für die Entwicklung - im Betrieb mit gunicorn starten (siehe gunicorn.conf.py)
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
@@ -0,0 +1,20 @@
+# gunicorn.conf.py - Produktions-Server Konfiguration
+# Start: gunicorn app:app  (diese Datei wird automatisch geladen)
+
+import os
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# gevent-Worker: während ein Request auf die Gemini API wartet,
+# werden andere Requests im selben Worker weiter bedient
+worker_class = 'gevent'
+worker_connections = 1000
+
+# Nur ein Prozess: Datenversion, Antwort-Cache und ETags liegen im Speicher
+# des Prozesses. Bei mehreren Workern würde eine Änderung in Worker A den
+# Cache von Worker B nicht ungültig machen. gevent sorgt bereits für
+# Parallelität, und SQLite erlaubt ohnehin nur einen Schreiber gleichzeitig.
+workers = 1
+
+# Gemini-Antworten können mehrere Sekunden dauern
+timeout = 120
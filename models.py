@@ -21,20 +21,28 @@ class Module(db.Model):
     # Beziehung zu Sessions (CASCADE: Sessions werden gelöscht wenn Modul gelöscht wird)
     sessions = db.relationship('LearningSession', backref='module', lazy=True, cascade='all, delete-orphan')
     
-    def to_dict(self, include_sessions=False):
-        """Konvertiert Modul zu Dictionary für JSON-Response"""
+    def to_dict(self, include_sessions=False, actual_hours=None):
+        """
+        Konvertiert Modul zu Dictionary für JSON-Response
+        (date/datetime bleiben nativ, der JSON-Provider serialisiert sie als ISO-String)
+        actual_hours: vorberechnete Stunden (z.B. aus einer GROUP BY Abfrage),
+        vermeidet das Nachladen der Sessions pro Modul
+        """
+        if actual_hours is None:
+            actual_hours = self.get_actual_hours()
+        
         data = {
             'id': self.id,
             'name': self.name,
             'target_hours': self.target_hours,
-            'exam_date': self.exam_date.isoformat() if self.exam_date else None,
-            'created_at': self.created_at.isoformat(),
-            'actual_hours': self.get_actual_hours(),
-            'progress_percentage': self.get_progress_percentage()
+            'exam_date': self.exam_date,
+            'created_at': self.created_at,
+            'actual_hours': actual_hours,
+            'progress_percentage': self.get_progress_percentage(actual_hours)
         }
         
         if include_sessions:
-            data['sessions'] = [session.to_dict() for session in self.sessions]
+            data['sessions'] = [session.to_dict(module_name=self.name) for session in self.sessions]
         
         return data
     
@@ -43,11 +51,13 @@ class Module(db.Model):
         total = sum(session.duration for session in self.sessions)
         return round(total, 2)
     
-    def get_progress_percentage(self):
+    def get_progress_percentage(self, actual_hours=None):
         """Berechnet Fortschritt in Prozent (Ist/Soll * 100)"""
         if self.target_hours == 0:
             return 0
-        return round((self.get_actual_hours() / self.target_hours) * 100, 1)
+        if actual_hours is None:
+            actual_hours = self.get_actual_hours()
+        return round((actual_hours / self.target_hours) * 100, 1)
     
     def __repr__(self):
         return f'<Module {self.name}>'
@@ -58,6 +68,10 @@ class LearningSession(db.Model):
     Lern-Session Tabelle: Speichert einzelne Lerneinheiten
     """
     __tablename__ = 'learning_sessions'
+    __table_args__ = (
+        db.Index('ix_session_date', 'date'),
+        db.Index('ix_session_module_date', 'module_id', 'date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     module_id = db.Column(db.Integer, db.ForeignKey('modules.id'), nullable=False)
@@ -66,16 +80,22 @@ class LearningSession(db.Model):
     notes = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
-    def to_dict(self):
-        """Konvertiert Session zu Dictionary für JSON-Response"""
+    def to_dict(self, module_name=None):
+        """
+        Konvertiert Session zu Dictionary für JSON-Response
+        module_name: bereits bekannter Modulname, spart das Nachladen von self.module
+        """
+        if module_name is None and self.module:
+            module_name = self.module.name
+        
         return {
             'id': self.id,
             'module_id': self.module_id,
-            'module_name': self.module.name if self.module else None,
+            'module_name': module_name,
             'duration': self.duration,
-            'date': self.date.isoformat(),
+            'date': self.date,
             'notes': self.notes,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
     
     def __repr__(self):
@@ -97,7 +117,7 @@ class AIRecommendation(db.Model):
         return {
             'id': self.id,
             'recommendation_text': self.recommendation_text,
-            'created_at': self.created_at.isoformat()
+            'created_at': self.created_at
         }
     
     def __repr__(self):